@@ -1,14 +1,18 @@
 from typing import List, Dict, Mapping, Collection, Callable, Iterator, Iterable, Optional, Union
-from copy import copy
+from array import array
+from bisect import bisect_right
 import itertools
 import functools
+import heapq
 import operator
 from warnings import warn
+from weakref import WeakValueDictionary
 
 # change this to another module if you want to swap in another engine such as that provided by `regex`
 import re
 
-from .utils import utf_codepoint, to_char, escape_for_char_class, identity, to_rename_callable, to_regex_flag_chars
+from .utils import utf_codepoint, to_char, escape_for_char_class, identity, to_rename_callable
+from .utils import cached_property, type_dispatch, to_regex_flag_chars_cached as to_regex_flag_chars
 from .utils import (
     validate_positive_int,
     validate_range_arg,
@@ -34,21 +38,91 @@ ATOMIC_GROUP_SUPPORT = False
 Pattern = type(re.compile(""))
 Match = type(re.compile("").match(""))
 
+_ASCII_CHARS = tuple(map(chr, range(128)))
+_ESCAPED_ASCII = tuple(map(re.escape, _ASCII_CHARS))
+_CHAR_CLASS_ESCAPES = {
+    codepoint: escaped
+    for codepoint, escaped in enumerate(map(escape_for_char_class, _ASCII_CHARS))
+    if escaped != _ASCII_CHARS[codepoint]
+}
+_RESERVED_ASCII_MASK = functools.reduce(operator.or_, (1 << ord(c) for c in CHAR_CLASS_RESERVED_CHARS))
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_cached(pattern: str, flags: int) -> Pattern:
+    # shared across Regex instances; distinct trees frequently render to the same pattern string
+    return re.compile(pattern, flags)
+
+
+def _drop_name(name: str) -> None:
+    # module-level rather than a lambda so that repeated `drop_names` calls hit the capture groups' rename caches
+    return None
+
+
+def _pattern_in_ungrouped(self: 'Regex', regex: Optional['Regex'] = None) -> str:
+    # `pattern_for_quantification` for types whose patterns never need grouping; skips the flag check per call
+    return self.pattern_in(regex)
+
+
+def _pattern_in_grouped(self: 'Regex', regex: Optional['Regex'] = None) -> str:
+    return f"(?:{self.pattern_in(regex)})"
+
+
+def _validation_settings():
+    return REQUIRE_FIX_LEN_LOOKBEHIND, REQUIRE_UNIQUE_GROUP_NAMES
+
+
+def _memoize_pattern(pattern_in: Callable[['Regex', Optional['Regex']], str]):
+    """Cache the result of `pattern_in` on regexes whose pattern doesn't depend on the containing regex.
+    Absent literal backreferences, the only thing that matters about the containing regex is whether there is one."""
+    @functools.wraps(pattern_in)
+    def memoized_pattern_in(self: 'Regex', regex: Optional['Regex'] = None) -> str:
+        if not self._context_free:
+            return pattern_in(self, regex)
+        key = "_pattern_in_none" if regex is None else "_pattern_in_regex"
+        cache = self.__dict__
+        pattern = cache.get(key)
+        if pattern is None:
+            pattern = cache[key] = pattern_in(self, regex)
+        return pattern
+
+    return memoized_pattern_in
+
 
 class Regex:
+    # the __dict__ holds only lazily-computed caches (pattern, compiled, node lists, etc.); the attributes set at
+    # construction live in slots declared by the subclasses
+    __slots__ = ("__dict__", "__weakref__")
     _require_group_for_quantification = True
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # whether a type's pattern needs grouping to be quantified is static; when a subclass sets the flag without
+        # defining its own `pattern_for_quantification`, bind the matching form directly instead of checking per call
+        if "_require_group_for_quantification" in cls.__dict__ and "pattern_for_quantification" not in cls.__dict__:
+            cls.pattern_for_quantification = (
+                _pattern_in_grouped if cls._require_group_for_quantification else _pattern_in_ungrouped
+            )
+
     def compile(
-        self, flags: Optional[Union[int, re.RegexFlag]] = re.UNICODE
+        self, flags: Union[int, re.RegexFlag] = int(re.UNICODE)
     ) -> Pattern:
-        self.validate()
-        return re.compile(self.pattern, flags)
+        # regexes are immutable once constructed, so validation need only be repeated if the engine settings change
+        if self.__dict__.get("_validated") != _validation_settings():
+            self.validate()
+        # RegexFlag combinations are enum instances; key the cache on plain ints
+        return _compile_cached(self.pattern, flags if type(flags) is int else int(flags))
 
     @property
-    def compiled(self):
-        regex = self.compile()
-        self.__dict__["compiled"] = regex
-        return regex
+    def compiled(self) -> Pattern:
+        # validate again whenever the settings have changed, as `compile` does; only the compiled pattern is cached
+        cache = self.__dict__
+        if cache.get("_validated") != _validation_settings():
+            self.validate()
+        compiled = cache.get("_compiled")
+        if compiled is None:
+            compiled = cache["_compiled"] = self.compile()
+        return compiled
 
     def match(self, string: str) -> Optional[Match]:
         """see `re.match`"""
@@ -82,7 +156,7 @@ class Regex:
         """see `re.split`"""
         return self.compiled.split(string, maxsplit)
 
-    @property
+    @cached_property
     def pattern(self) -> str:
         """The string literal pattern for this regex"""
         return self.pattern_in(None)
@@ -96,11 +170,24 @@ class Regex:
         current names and returning new names. If either mapping lookup fails to find the current name, it
         is left as-is. If the lookup values contain None or the callable returns None, the corresponding named
         groups will be converted into unnamed capture groups (int-indexed)"""
+        rename = to_rename_callable(renames)
+        # mappings are normalized to value-comparable callables, so repeating an equal mapping hits the cache.
+        # only the last rename is kept: literals, specials and char classes are shared process-wide, and a cache
+        # of every rename on those would grow without bound
+        last = self.__dict__.get("_last_rename")
+        if last is not None and last[0] == rename:
+            return last[1]
+        renamed = self._rename(rename)
+        self.__dict__["_last_rename"] = (rename, renamed)
+        return renamed
+
+    def _rename(self, rename: RenameFunc) -> 'Regex':
+        """Recursive implementation of `rename`, taking an already-normalized rename callable"""
         return self
 
     def drop_names(self):
         """Return a regex with all named capture groups converted to unnamed capture groups"""
-        return self.rename(lambda name: None)
+        return self.rename(_drop_name)
 
     @property
     def captured(self) -> 'CaptureGroup':
@@ -143,7 +230,7 @@ class Regex:
 
     def pattern_for_quantification(self, regex: Optional['Regex'] = None):
         if self._require_group_for_quantification:
-            return "(?:{})".format(self.pattern_in(regex))
+            return f"(?:{self.pattern_in(regex)})"
         return self.pattern_in(regex)
 
     @property
@@ -151,12 +238,18 @@ class Regex:
         """Iterate over all sub-regexes contained in this one"""
         yield from ()
 
+    @cached_property
+    def _context_free(self) -> bool:
+        """Whether the pattern of this regex is independent of any regex containing it, i.e. it contains no
+        backreferences to literal Regex objects"""
+        return all(r._context_free for r in self.subregexes)
+
     @property
     def capture_groups(self) -> Iterator['CaptureGroup']:
         """Iterate over all capture groups contained in this one (named and unnamed)"""
         return (
             regex
-            for regex in self._depth_first_walk()
+            for regex in self._nodes
             if isinstance(regex, (CaptureGroup, NamedGroup))
         )
 
@@ -164,14 +257,31 @@ class Regex:
     def named_groups(self) -> Iterator['NamedGroup']:
         """Iterate over all named capture groups contained in this one"""
         return (
-            regex for regex in self._depth_first_walk() if isinstance(regex, NamedGroup)
+            regex for regex in self._nodes if isinstance(regex, NamedGroup)
         )
 
+    @cached_property
+    def _capture_group_index(self) -> Dict[int, int]:
+        # id -> 1-based index of each capture group, for resolving literal backrefs; the first occurrence wins.
+        # the id -> name map for named groups is filled in the same pass
+        index, names = {}, {}
+        for i, group in enumerate(self.capture_groups, 1):
+            index.setdefault(id(group), i)
+            if isinstance(group, NamedGroup):
+                names[id(group)] = group.name
+        self.__dict__["_named_group_index"] = names
+        return index
+
+    @cached_property
+    def _named_group_index(self) -> Dict[int, str]:
+        self._capture_group_index
+        return self.__dict__["_named_group_index"]
+
     @property
     def backrefs(self) -> Iterator['_BackRef']:
         """Iterate over all back-references to previous groups contained in this regex"""
         return (
-            regex for regex in self._depth_first_walk() if isinstance(regex, _BackRef)
+            regex for regex in self._nodes if isinstance(regex, _BackRef)
         )
 
     def validate(self) -> 'Regex':
@@ -180,76 +290,61 @@ class Regex:
         - backrefs to groups which haven't been encountered yet
         - variable-length lookbehind assertions"""
 
-        named_groups = {}
-        numbered_groups = {}
-        group_ids = {}
-        last_group_index = 0
-        for group in self._depth_first_walk():
-            if isinstance(group, _BackRef):
-                if isinstance(group, _LiteralBackref):
-                    if id(group.groupref) not in group_ids:
-                        raise IndexError(
-                            "group {} is literal backref to a group that does not appear prior in pattern {}".format(
-                                repr(group), repr(self)
-                            )
-                        )
-                elif isinstance(group, NamedBackref):
-                    if group.groupref not in named_groups:
-                        raise IndexError(
-                            "group {} is named backref to group with name '{}' which doesn't appear "
-                            "prior in pattern {}".format(
-                                group, group.groupref, repr(self)
-                            )
-                        )
-                elif isinstance(group, IntBackref):
-                    if group.groupref > last_group_index:
-                        raise IndexError(
-                            "group {} is integer backref to group at index {} but only {} capture groups "
-                            "appear prior in pattern {}".format(
-                                group, group.groupref, last_group_index, repr(self)
-                            )
-                        )
-            elif isinstance(group, NamedGroup):
-                if group.name in named_groups:
-                    msg = ("named group {} uses name '{}' which appears previously in pattern {}"
-                           .format(group, group.name, repr(self)))
-                    if REQUIRE_UNIQUE_GROUP_NAMES:
-                        raise NameError(msg)
-                    else:
-                        warn(msg)
-
-                group_ids[id(group)] = group
-                named_groups[group.name] = group
-                last_group_index += 1
-                numbered_groups[last_group_index] = group
-            elif isinstance(group, CaptureGroup):
-                group_ids[id(group)] = group
-                last_group_index += 1
-                numbered_groups[last_group_index] = group
-            elif REQUIRE_FIX_LEN_LOOKBEHIND and isinstance(group, Lookbehind):
-                if not group.assertion_is_fixed_len(named_groups, numbered_groups):
-                    raise ValueError(
-                        "lookbehind assertion in pattern '{}' is not fixed-length".format(
-                            group
-                        )
-                    )
+        state = _ValidationState(self)
+        for group in self._nodes:
+            handler = _validation_handler(type(group))
+            if handler is not None:
+                handler(group, state)
 
+        self.__dict__["_validated"] = _validation_settings()
         return self
 
     def debug_match(self, string: str, print_failures: bool = False):
+        if self.__dict__.get("_validated") != _validation_settings():
+            self.validate()
+        # the partials are prefixes of an already-validated regex; compile them directly, once per distinct pattern
         match = None
-        for regex in self.partial_regexes(debug=True):
-            match = regex.match(string)
+        matches = {}
+        for pattern in self._debug_partial_patterns():
+            if pattern in matches:
+                match = matches[pattern]
+                continue
+            match = matches[pattern] = _compile_cached(pattern, int(re.UNICODE)).match(string)
             if print_failures and match is None:
-                print("FAIL: '{}'\n".format(regex))
+                print("FAIL: '{}'\n".format(pattern))
             elif match:
-                print("MATCH IN '{}':\n" "    '{}'\n".format(regex, match.group()))
+                print("MATCH IN '{}':\n" "    '{}'\n".format(pattern, match.group()))
         return match
 
+    def _debug_partial_patterns(self) -> Iterator[str]:
+        # the partials are rebuilt on every call so that they print their structural notes live, in order;
+        # rendering them costs more than building them, so their patterns are rendered only on the first call
+        partials = self.partial_regexes(debug=True)
+        patterns = self.__dict__.get("_debug_patterns")
+        if patterns is not None:
+            # partials first, so that it is exhausted too and prints any notes following the last partial
+            for _, pattern in zip(partials, patterns):
+                yield pattern
+            return
+        patterns = []
+        for regex in partials:
+            patterns.append(regex.pattern)
+            yield patterns[-1]
+        self.__dict__["_debug_patterns"] = patterns
+
     def _depth_first_walk(self) -> Iterator['Regex']:
-        yield self
-        for regex in self.subregexes:
-            yield from regex._depth_first_walk()
+        return iter(self._nodes)
+
+    @cached_property
+    def _nodes(self) -> List['Regex']:
+        """All regexes contained in this one, itself included, in depth-first pre-order"""
+        nodes = []
+        stack = [self]
+        while stack:
+            regex = stack.pop()
+            nodes.append(regex)
+            stack.extend(reversed(tuple(regex.subregexes)))
+        return nodes
 
     def partial_regexes(self, debug: bool = False) -> Iterator['Regex']:
         yield self
@@ -328,10 +423,10 @@ class Regex:
 
 
 class _WithOneSubRegex(Regex):
-    _regex = None
+    __slots__ = ("_regex",)
 
     def __init__(self, regex: Regex):
-        self._regex = to_regex(regex)
+        self._regex = _as_regex(regex)
 
     @property
     def subregexes(self):
@@ -341,25 +436,55 @@ class _WithOneSubRegex(Regex):
     def len(self):
         return self._regex.len
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> '_WithOneSubRegex':
-        return type(self)(self._regex.rename(renames))
+    def _rename(self, rename: RenameFunc) -> '_WithOneSubRegex':
+        return type(self)(self._regex._rename(rename))
 
 
 class _SpecialClass(Regex):
+    __slots__ = ("char",)
     _require_group_for_quantification = False
+    _interned = {}  # type: Dict[tuple, _SpecialClass]
+
+    def __new__(cls, *args):
+        # value objects identified by their escape character; share a single instance per class and character
+        if len(args) == 1:
+            key = (cls, args[0])
+            special = _SpecialClass._interned.get(key)
+            if special is None:
+                special = _SpecialClass._interned[key] = super().__new__(cls)
+            return special
+        return super().__new__(cls)
 
     def __init__(self, char: str):
         self.char = char
 
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return r"\{}".format(self.char)
+        return rf"\{self.char}"
 
     @property
     def len(self):
         return 0
 
 
+def _special_symbol_args(symbol: str, len_=0) -> tuple:
+    return symbol, len_
+
+
 class _SpecialSymbol(Regex):
+    __slots__ = ("symbol", "_len")
+    _interned = {}  # type: Dict[tuple, _SpecialSymbol]
+
+    def __new__(cls, *args, **kwargs):
+        # as for _SpecialClass, share a single instance per symbol; no-arg calls, as from `copy` or unpickling,
+        # always get a fresh instance, since those then set the state themselves
+        if not args and not kwargs:
+            return super().__new__(cls)
+        key = (cls, *_special_symbol_args(*args, **kwargs))
+        special = _SpecialSymbol._interned.get(key)
+        if special is None:
+            special = _SpecialSymbol._interned[key] = super().__new__(cls)
+        return special
+
     def __init__(self, symbol: str, len_=0):
         self.symbol = symbol
         self._len = len_
@@ -381,15 +506,17 @@ class _AcceptableInCharClass(Regex):
     def __or__(self, other):
         if isinstance(other, _AcceptableInCharClass):
             return CharClass(self, other)
-        other = to_regex(other)
+        other = _as_regex(other)
         if isinstance(other, Literal) and len(other.string) == 1:
             return CharClass(self, other.string)
         return super().__or__(other)
 
     def __ror__(self, other):
-        other = to_regex(other)
-        if isinstance(other, _AcceptableInCharClass) or (isinstance(other, Literal) and len(other.string) == 1):
-            return CharClass(self, other.string)
+        other = _as_regex(other)
+        if isinstance(other, _AcceptableInCharClass):
+            return CharClass(other, self)
+        if isinstance(other, Literal) and len(other.string) == 1:
+            return CharClass(other.string, self)
         return super().__ror__(other)
 
     @property
@@ -418,6 +545,8 @@ class _SpecialClassAcceptableInCharClass(_SpecialClass, _AcceptableInCharClass):
 
 
 class Comment(Regex):
+    __slots__ = ("comment",)
+
     def __init__(self, comment: str):
         if not isinstance(comment, str):
             raise TypeError("comment must be a string; got {}".format(type(comment)))
@@ -429,7 +558,7 @@ class Comment(Regex):
         yield from ()
 
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return "(?#{})".format(self.comment)
+        return f"(?#{self.comment})"
 
     @property
     def len(self):
@@ -437,6 +566,9 @@ class Comment(Regex):
 
 
 class _WithLocalFlags(_WithOneSubRegex):
+    __slots__ = ("pos_flags", "neg_flags")
+    _require_group_for_quantification = False
+
     def __init__(
         self, regex: Regex,
         pos_flags: Optional[Union[str, Collection[str]]] = None,
@@ -462,10 +594,11 @@ class _WithLocalFlags(_WithOneSubRegex):
         self.neg_flags = frozenset(neg_flags).difference(overlap)
         super().__init__(regex)
 
-    @property
-    def pattern(self) -> str:
+    @_memoize_pattern
+    def pattern_in(self, regex: Optional[Regex] = None) -> str:
+        regex = regex or self
         flag_str = (''.join(sorted(self.pos_flags)) + '-' + ''.join(sorted(self.neg_flags))).rstrip('-')
-        return "(?{}:{})".format(flag_str, self._regex.pattern)
+        return f"(?{flag_str}:{self._regex.pattern_in(regex)})"
 
     def with_options(self, *pos_flags: AnyRegexFlag) -> '_WithLocalFlags':
         pos_flags = to_regex_flag_chars(pos_flags)
@@ -475,8 +608,8 @@ class _WithLocalFlags(_WithOneSubRegex):
         neg_flags = to_regex_flag_chars(neg_flags)
         return _WithLocalFlags(self._regex, self.pos_flags, self.neg_flags.union(neg_flags))
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> '_WithLocalFlags':
-        return type(self)(self._regex.rename(renames), self.pos_flags, self.neg_flags)
+    def _rename(self, rename: RenameFunc) -> '_WithLocalFlags':
+        return type(self)(self._regex._rename(rename), self.pos_flags, self.neg_flags)
 
 
 class _NegativeAssertion(_WithOneSubRegex):
@@ -484,20 +617,20 @@ class _NegativeAssertion(_WithOneSubRegex):
         return self._regex
 
     def comment(self, comment: str):
-        new = copy(self)
-        new._regex = self._regex.comment(comment)
-        return new
+        return type(self)(self._regex.comment(comment))
 
 
 def AnythingBut(regex: Regex):
     """Matches any string except those matched by the supplied regex"""
-    return Lookahead(Literal(""), _NegativeAssertion(regex)) + ANYCHAR[:]
+    return Lookahead(_EMPTY_LITERAL, _NegativeAssertion(regex)) + ANYCHAR[:]
 
 
 class Lookahead(Regex):
+    __slots__ = ("_regex", "ahead")
+
     def __init__(self, regex: Regex, ahead: Regex):
-        self._regex = to_regex(regex)
-        self.ahead = to_regex(ahead)
+        self._regex = _as_regex(regex)
+        self.ahead = _as_regex(ahead)
 
     @property
     def subregexes(self):
@@ -508,6 +641,7 @@ class Lookahead(Regex):
         for r in self.ahead.partial_regexes(debug):
             yield Lookahead(self._regex, r)
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None):
         regex = regex or self
         if isinstance(self.ahead, _NegativeAssertion):
@@ -515,35 +649,34 @@ class Lookahead(Regex):
         else:
             assertion, ahead = '=', self.ahead
 
-        return "{}(?{}{})".format(
-            self._regex.pattern_in(regex), assertion, ahead.pattern_in(regex)
-        )
+        return f"{self._regex.pattern_in(regex)}(?{assertion}{ahead.pattern_in(regex)})"
 
     @property
     def len(self):
         return self._regex.len
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'Lookahead':
-        rename = to_rename_callable(renames)
-        return type(self)(self._regex.rename(rename), self.ahead.rename(rename))
+    def _rename(self, rename: RenameFunc) -> 'Lookahead':
+        return type(self)(self._regex._rename(rename), self.ahead._rename(rename))
 
 
 class Lookbehind(Regex):
+    __slots__ = ("_regex", "behind")
+
     def __init__(self, behind: Regex, regex: Regex):
-        self._regex = to_regex(regex)
-        self.behind = to_regex(behind)
+        self._regex = _as_regex(regex)
+        self.behind = _as_regex(behind)
 
     @property
     def subregexes(self):
         yield from (self.behind, self._regex)
 
     def partial_regexes(self, debug: bool = False):
-        empty = Literal("")
         for r in self.behind.partial_regexes(debug):
-            yield Lookbehind(r, empty)
+            yield Lookbehind(r, _EMPTY_LITERAL)
         for r in self._regex.partial_regexes(debug):
             yield Lookbehind(self.behind, r)
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
         if isinstance(self.behind, _NegativeAssertion):
@@ -551,9 +684,7 @@ class Lookbehind(Regex):
         else:
             assertion, behind = '=', self.behind
 
-        return "(?<{}{}){}".format(
-            assertion, behind.pattern_in(regex), self._regex.pattern_in(regex)
-        )
+        return f"(?<{assertion}{behind.pattern_in(regex)}){self._regex.pattern_in(regex)}"
 
     @property
     def len(self):
@@ -569,9 +700,9 @@ class Lookbehind(Regex):
         if len_ is None:
             behind = None
             if named_groups is not None and isinstance(self.behind, NamedBackref):
-                behind = named_groups.get(self.behind.name)
+                behind = named_groups.get(self.behind.groupref)
             elif numbered_groups is not None and isinstance(self.behind, IntBackref):
-                behind = numbered_groups.get(self.behind.n)
+                behind = numbered_groups.get(self.behind.groupref)
 
             if behind is not None:
                 return behind.len is not None
@@ -579,28 +710,78 @@ class Lookbehind(Regex):
         else:
             return True
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'Lookbehind':
-        rename = to_rename_callable(renames)
-        return type(self)(self.behind.rename(rename), self._regex.rename(rename))
+    def _rename(self, rename: RenameFunc) -> 'Lookbehind':
+        return type(self)(self.behind._rename(rename), self._regex._rename(rename))
 
 
 class _Atomic(_WithOneSubRegex):
+    _require_group_for_quantification = False
+
+    @_memoize_pattern
     def pattern_in(self, regex: Optional['Regex'] = None):
         regex = regex or self
-        return "(?>{})".format(self._regex.pattern_in(regex))
+        return f"(?>{self._regex.pattern_in(regex)})"
 
 
 def Atomic(regex: Regex) -> Regex:
     """An atomic group, i.e. one which, upon matching, is permanently consumed; no later backtracking which would
     negate the contents of the match can be performed. The Python `re` module doesn't support this natively but it
     can be expressed with lookbehind assertions"""
+    regex = _as_regex(regex)
+    if _is_atomic(regex):
+        return regex
     if ATOMIC_GROUP_SUPPORT:
         return _Atomic(regex)
     group = CaptureGroup(regex)
-    return Lookahead(Literal(""), group) + BackRef(group)
+    return Lookahead(_EMPTY_LITERAL, group) + BackRef(group)
+
+
+def _is_atomic(regex: Regex) -> bool:
+    # already atomic, either natively or as emulated by `Atomic`, or a zero-width special which can't backtrack;
+    # wrapping these again would only add a group (and, when emulated, a capture group and a backreference)
+    if isinstance(regex, _Atomic):
+        return True
+    if isinstance(regex, (_SpecialClass, _SpecialSymbol)):
+        return regex.len == 0
+    if type(regex) is Sequence and len(regex.regexes) == 2:
+        ahead, backref = regex.regexes
+        return (
+            type(ahead) is Lookahead
+            and ahead._regex is _EMPTY_LITERAL
+            and type(backref) is LiteralUnnamedBackref
+            and backref.groupref is ahead.ahead
+        )
+    return False
+
+
+def _escape(string: str) -> str:
+    # single characters are by far the most common literals, e.g. from `C[...] | 'x'` or `'(' + ... + ')'`
+    if len(string) == 1:
+        codepoint = ord(string)
+        if codepoint < 128:
+            return _ESCAPED_ASCII[codepoint]
+    return re.escape(string)
 
 
 class Literal(Regex):
+    __slots__ = ("string",)
+    _interned = {}  # type: Dict[str, Literal]
+
+    def __new__(cls, *args):
+        # the empty string and single characters are ubiquitous and immutable; share a single instance of each.
+        # longer strings are shared through a bounded cache, since arbitrarily many distinct ones may be built.
+        # (no-arg calls, as from `copy`, always get a fresh instance)
+        if cls is Literal and len(args) == 1:
+            string = args[0]
+            if type(string) is str:
+                if len(string) > 1:
+                    return _new_literal(string)
+                literal = cls._interned.get(string)
+                if literal is None:
+                    literal = cls._interned[string] = super().__new__(cls)
+                return literal
+        return super().__new__(cls)
+
     def __init__(self, string: str):
         if not isinstance(string, str):
             raise TypeError(
@@ -608,16 +789,32 @@ class Literal(Regex):
             )
         self.string = string
 
+    def __add__(self, other: Union[Regex, str]) -> Regex:
+        # literal + literal is just a longer literal
+        if type(other) is str or type(other) is Literal:
+            return Literal(self.string + (other if type(other) is str else other.string))
+        return super().__add__(other)
+
+    def __radd__(self, other: Union[Regex, str]) -> Regex:
+        if type(other) is str:
+            return Literal(other + self.string)
+        return super().__radd__(other)
+
     def partial_regexes(self, debug: bool = False):
         for i in range(1, len(self.string) + 1):
             yield Literal(self.string[:i])
 
+    @cached_property
+    def _escaped(self) -> str:
+        return _escape(self.string)
+
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return re.escape(self.string)
+        # literals never depend on the containing regex; one cached escape serves every context
+        return self._escaped
 
     def pattern_for_quantification(self, regex: Optional['Regex'] = None):
         if len(self.string) == 1:
-            return re.escape(self.string)
+            return self._escaped
         return super().pattern_for_quantification(regex)
 
     @property
@@ -625,21 +822,31 @@ class Literal(Regex):
         return len(self.string)
 
 
+@functools.lru_cache(maxsize=1024)
+def _new_literal(string: str) -> Literal:
+    # keyed on the string alone; `Literal.__init__` then (re)sets the same value on the shared instance
+    return Regex.__new__(Literal)
+
+
+_EMPTY_LITERAL = Literal("")
+
+
 class _CaptureGroupMixin(_WithOneSubRegex):
+    __slots__ = ("_rename_cache",)
+
     def __init__(self, regex: Regex):
         self._rename_cache = {}
         super().__init__(regex)
 
-    def _rename(self, renames):
+    def _rename_uncached(self, rename: RenameFunc):
         raise NotImplementedError()
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'CaptureGroup':
+    def _rename(self, rename: RenameFunc) -> 'CaptureGroup':
         # there _might_ be some LiteralBackreference holding a reference to `self` and we want to be able to tell it
         # where the renamed `self` went to when `self` is renamed
-        rename = to_rename_callable(renames)
         renamed = self._rename_cache.get(rename)
         if renamed is None:
-            renamed = self._rename(rename)
+            renamed = self._rename_uncached(rename)
             self._rename_cache[rename] = renamed
 
         return renamed
@@ -648,8 +855,8 @@ class _CaptureGroupMixin(_WithOneSubRegex):
 class CaptureGroup(_CaptureGroupMixin):
     _require_group_for_quantification = False
 
-    def _rename(self, renames):
-        return _WithOneSubRegex.rename(self, renames)
+    def _rename_uncached(self, rename: RenameFunc):
+        return _WithOneSubRegex._rename(self, rename)
 
     def partial_regexes(self, debug: bool = False):
         if debug:
@@ -657,12 +864,14 @@ class CaptureGroup(_CaptureGroupMixin):
         for r in self._regex.partial_regexes(debug):
             yield CaptureGroup(r)
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
-        return "({})".format(self._regex.pattern_in(regex))
+        return f"({self._regex.pattern_in(regex)})"
 
 
 class NamedGroup(_CaptureGroupMixin):
+    __slots__ = ("name",)
     _require_group_for_quantification = False
 
     def __init__(self, regex: Regex, name: str):
@@ -679,31 +888,38 @@ class NamedGroup(_CaptureGroupMixin):
         for r in self._regex.partial_regexes(debug):
             yield NamedGroup(r, self.name)
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
-        return "(?P<{}>{})".format(self.name, self._regex.pattern_in(regex))
+        return f"(?P<{self.name}>{self._regex.pattern_in(regex)})"
 
-    def _rename(self, renames):
-        rename = to_rename_callable(renames)
+    def _rename_uncached(self, rename: RenameFunc):
         new_name = rename(self.name)
         if new_name is None:
-            return CaptureGroup(self._regex.rename(rename))
-        return type(self)(self._regex.rename(rename), new_name)
+            return CaptureGroup(self._regex._rename(rename))
+        return type(self)(self._regex._rename(rename), new_name)
 
 
 class _Flattening(Regex):
-    regexes = ()
+    __slots__ = ("regexes",)
 
     def __init__(self, *regexes: Regex):
-        self.regexes = tuple(
-            itertools.chain.from_iterable(map(self._to_regexes, regexes))
-        )
+        cls = type(self)
+        flat = []
+        for regex in regexes:
+            if type(regex) is cls:
+                flat.extend(regex.regexes)
+            else:
+                flat.append(_as_regex(regex))
+        # a tuple rather than a list; subregexes are shared between trees and must stay immutable
+        self.regexes = tuple(flat)
 
     @classmethod
-    def _to_regexes(cls, other):
-        if isinstance(other, cls):
-            return other.regexes
-        return (to_regex(other),)
+    def _from_flat(cls, regexes: tuple) -> '_Flattening':
+        """Construct directly from an already-flattened tuple of Regex instances"""
+        new = cls.__new__(cls)
+        new.regexes = regexes
+        return new
 
     @property
     def subregexes(self):
@@ -711,26 +927,44 @@ class _Flattening(Regex):
 
     def partial_regexes(self, debug: bool = False):
         cls = type(self)
-        rs = []
+        prefix = ()
         for r in self.regexes:
             for s in r.partial_regexes(debug):
-                yield cls(*rs, s)
-            rs.append(r)
+                # the prefix is already flat; only the partial itself may need flattening
+                yield cls._from_flat(prefix + (s.regexes if type(s) is cls else (s,)))
+            prefix += (r,)
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> '_Flattening':
-        rename = to_rename_callable(renames)
-        return type(self)(*(r.rename(rename) for r in self.regexes))
+    def _rename(self, rename: RenameFunc) -> '_Flattening':
+        return type(self)(*(r._rename(rename) for r in self.regexes))
 
 
 class Sequence(_Flattening):
+    def __init__(self, *regexes: Regex):
+        super().__init__(*regexes)
+        self.regexes = _fold_literals(self.regexes)
+
+    @classmethod
+    def _from_flat(cls, regexes: tuple) -> 'Sequence':
+        return super()._from_flat(_fold_literals(regexes))
+
+    def __add__(self, other: Union[Regex, str]) -> 'Sequence':
+        if type(other) is type(self):
+            return self._from_flat(self.regexes + other.regexes)
+        return self._from_flat(self.regexes + (_as_regex(other),))
+
+    def __radd__(self, other: Union[Regex, str]) -> 'Sequence':
+        return self._from_flat((_as_regex(other),) + self.regexes)
+
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
-        return "".join(r.pattern_in(regex) for r in self.regexes)
+        return "".join([r.pattern_in(regex) for r in self.regexes])
 
-    @property
+    @cached_property
     def len(self):
         len_ = 0
-        for l in map(operator.attrgetter("len"), self.regexes):
+        for r in self.regexes:
+            l = r.len
             if l is None:
                 return None
             len_ += l
@@ -740,23 +974,87 @@ class Sequence(_Flattening):
 class Alternation(_Flattening):
     _require_group_for_quantification = False
 
+    def __init__(self, *regexes: Regex):
+        super().__init__(*regexes)
+        self.regexes = _fold_single_chars(self.regexes)
+
+    @classmethod
+    def _from_flat(cls, regexes: tuple) -> 'Alternation':
+        return super()._from_flat(_fold_single_chars(regexes))
+
+    def __or__(self, other: Union[Regex, str]) -> 'Alternation':
+        if type(other) is type(self):
+            return self._from_flat(self.regexes + other.regexes)
+        return self._from_flat(self.regexes + (_as_regex(other),))
+
+    def __ror__(self, other: Union[Regex, str]) -> 'Alternation':
+        return self._from_flat((_as_regex(other),) + self.regexes)
+
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
+        if len(self.regexes) == 1:
+            # e.g. an alternation of single chars folded into one CharSet
+            return self.regexes[0].pattern_in(regex or self)
         if regex is None:
-            template, regex = "{}", self
-        else:
-            template = "(?:{})"
-        return template.format("|".join(r.pattern_in(regex) for r in self.regexes))
+            return "|".join([r.pattern_in(self) for r in self.regexes])
+        return f"(?:{'|'.join([r.pattern_in(regex) for r in self.regexes])})"
 
-    @property
+    def pattern_for_quantification(self, regex: Optional[Regex] = None) -> str:
+        if len(self.regexes) == 1:
+            return self.regexes[0].pattern_for_quantification(regex or self)
+        return self.pattern_in(regex)
+
+    @cached_property
     def len(self):
-        len_ = None
-        for l in map(operator.attrgetter("len"), self.regexes):
-            if l is None:
-                return None
-            if len_ is None:
-                len_ = l
-            elif l != len_:
+        regexes = iter(self.regexes)
+        # an empty alternation matches only the empty string
+        len_ = next(regexes, _EMPTY_LITERAL).len
+        if len_ is None:
+            return None
+        for r in regexes:
+            if r.len != len_:
                 return None
+        return len_
+
+
+def _single_chars(regex: Regex) -> Optional[Iterable[str]]:
+    if type(regex) is Literal and len(regex.string) == 1:
+        return regex.string
+    if type(regex) is CharSet:
+        return regex
+    return None
+
+
+def _fold_literals(regexes: tuple) -> tuple:
+    """Merge each run of adjacent plain literals in a sequence into one literal; escaping is per-char, so the pattern
+    is unchanged. Groups and other wrappers are distinct types, so named parts are never merged across"""
+    folded = []
+    for regex in regexes:
+        if type(regex) is Literal and folded and type(folded[-1]) is Literal:
+            folded[-1] = Literal(folded[-1].string + regex.string)
+        else:
+            folded.append(regex)
+    return regexes if len(folded) == len(regexes) else tuple(folded)
+
+
+def _fold_single_chars(regexes: tuple) -> tuple:
+    """Merge each run of 2 or more adjacent single-char alternatives into one CharSet. Within such a run at most one
+    char can match at any position, so the order in which they are tried doesn't matter; across other alternatives
+    it does, so only adjacent ones are merged"""
+    folded, run = [], []
+    for regex in itertools.chain(regexes, (None,)):
+        chars = None if regex is None else _single_chars(regex)
+        if chars is not None:
+            run.append((regex, chars))
+            continue
+        if len(run) > 1:
+            folded.append(CharSet(*(chars_ for _, chars_ in run)))
+        elif run:
+            folded.append(run[0][0])
+        run.clear()
+        if regex is not None:
+            folded.append(regex)
+    return regexes if len(folded) == len(regexes) else tuple(folded)
 
 
 def RangeRepeated(
@@ -793,6 +1091,7 @@ def RangeRepeated(
 
 
 class _SpecialRepeating(_WithOneSubRegex):
+    __slots__ = ("_greedy",)
     _repetition_symbol = None
 
     def __init__(self, regex: Regex, greedy: bool = True):
@@ -815,6 +1114,10 @@ class _SpecialRepeating(_WithOneSubRegex):
         yield from self._regex.partial_regexes(debug)
         yield self
 
+    def _rename(self, rename: RenameFunc) -> '_SpecialRepeating':
+        return type(self)(self._regex._rename(rename), self._greedy)
+
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
         # repetitions are greedy by default
@@ -840,8 +1143,7 @@ class ZeroOrOne(_SpecialRepeating):
 
 
 class _RangeRepeating(_WithOneSubRegex):
-    start = None
-    stop = None
+    __slots__ = ("start", "stop")
 
     def __init__(
         self, regex: Regex, start: Optional[int] = None, stop: Optional[int] = None
@@ -855,24 +1157,29 @@ class _RangeRepeating(_WithOneSubRegex):
             yield from Repeated(self._regex, self.start).partial_regexes(debug)
         yield self
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
+        regex = regex or self
         base = self._regex.pattern_for_quantification(regex)
-        return "{}{{{},{}}}".format(base, self.start or 0, self.stop or "")
+        return f"{base}{{{self.start or 0},{self.stop or ''}}}"
 
     @property
     def len(self):
+        # a variable repetition count is variable-length whatever is repeated; don't walk the subregex for that
+        if self.start != self.stop:
+            return None
         len_ = self._regex.len
         if len_ is None:
             return None
-        if self.start == self.stop:
-            return self.start * len_
-        return None
+        return self.start * len_
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> '_RangeRepeating':
-        return type(self)(self._regex.rename(renames), self.start, self.stop)
+    def _rename(self, rename: RenameFunc) -> '_RangeRepeating':
+        return type(self)(self._regex._rename(rename), self.start, self.stop)
 
 
 class Repeated(_WithOneSubRegex):
+    __slots__ = ("n",)
+
     def __init__(self, regex: Regex, n: int):
         self.n = validate_positive_int(n, "fixed repetition counts")
         super().__init__(regex)
@@ -880,17 +1187,20 @@ class Repeated(_WithOneSubRegex):
     def partial_regexes(self, debug: bool = False):
         rs = list(self._regex.partial_regexes(debug))[:-1]
         yield from rs
+        tails = [r.regexes if type(r) is Sequence else (r,) for r in rs]
         for i in range(1, self.n):
             rep = Repeated(self._regex, i)
             yield rep
-            for r in rs:
-                yield rep + r
+            head = (rep,)
+            for tail in tails:
+                yield Sequence._from_flat(head + tail)
         yield self
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
         base = self._regex.pattern_for_quantification(regex)
-        return "{}{{{}}}".format(base, self.n)
+        return f"{base}{{{self.n}}}"
 
     def __mul__(self, n: int) -> 'Repeated':
         return Repeated(self._regex, self.n * n)
@@ -902,70 +1212,121 @@ class Repeated(_WithOneSubRegex):
             return None
         return len_ * self.n
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'Repeated':
-        return type(self)(self._regex.rename(renames), self.n)
+    def _rename(self, rename: RenameFunc) -> 'Repeated':
+        return type(self)(self._regex._rename(rename), self.n)
+
+
+def _membership_codepoint(container, char: Union[int, str]) -> int:
+    # single chars and in-bounds codepoints are by far the common case; skip the validating dispatch for them
+    type_ = type(char)
+    if type_ is str:
+        if len(char) == 1:
+            return ord(char)
+    elif type_ is int:
+        if 0 <= char <= MAX_UNICODE_CODE_POINT:
+            return char
+    try:
+        return utf_codepoint(char)
+    except ValueError:
+        raise ValueError(
+            "can only check for containment of single character in {}; got {}".format(
+                type(container), char
+            )
+        )
+    except TypeError:
+        raise TypeError(
+            "can only check for int or single character in {}; got {}".format(
+                type(container), type(char)
+            )
+        )
 
 
 class _CharSetOrRange(_AcceptableInCharClass):
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return "[{}]".format(self.pattern_in_char_class)
+        return f"[{self.pattern_in_char_class}]"
 
 
 class CharSet(_CharSetOrRange):
-    def __init__(self, *chars: str):
-        chars = (to_char(c) if isinstance(c, int) else c for c in chars)
-        chars = set(itertools.chain.from_iterable(chars))
-        special_chars = []
+    __slots__ = ("chars", "special_chars", "_ascii_mask", "_nonascii")
 
-        for c in CHAR_CLASS_RESERVED_CHARS:
-            if c in chars:
-                chars.remove(c)
-                special_chars.append(c)
+    def __init__(self, *chars: str):
+        # one pass: ASCII chars go in a membership bitmask, the (typically few) remaining chars in a set
+        ascii_mask, nonascii = 0, set()
+        for chars_ in chars:
+            for c in (to_char(chars_),) if isinstance(chars_, int) else chars_:
+                codepoint = ord(c)
+                if codepoint < 128:
+                    ascii_mask |= 1 << codepoint
+                else:
+                    nonascii.add(c)
 
-        self.chars = tuple(sorted(chars))
+        special_chars = []
+        mask = ascii_mask
+        if mask & _RESERVED_ASCII_MASK:
+            for c in CHAR_CLASS_RESERVED_CHARS:
+                bit = 1 << ord(c)
+                if mask & bit:
+                    special_chars.append(c)
+            mask &= ~_RESERVED_ASCII_MASK
+
+        # recover the sorted ASCII chars from the set bits, lowest first
+        ascii_chars = []
+        while mask:
+            low_bit = mask & -mask
+            ascii_chars.append(_ASCII_CHARS[low_bit.bit_length() - 1])
+            mask ^= low_bit
+
+        ascii_chars.extend(sorted(nonascii))
+        self.chars = tuple(ascii_chars)
         self.special_chars = tuple(special_chars)
+        self._ascii_mask = ascii_mask
+        self._nonascii = frozenset(nonascii)
 
     def __or__(self, other):
+        # plain single chars are the common operand; don't allocate a Literal just to unwrap it again
+        if type(other) is str and len(other) == 1:
+            return CharSet(self.special_chars, self.chars, other)
         if isinstance(other, CharSet):
-            return CharSet(*self, *other)
-        other = to_regex(other)
+            return CharSet(self.special_chars, self.chars, other.special_chars, other.chars)
+        other = _as_regex(other)
         if isinstance(other, Literal) and len(other.string) == 1:
-            return CharSet(*self, other.string)
+            return CharSet(self.special_chars, self.chars, other.string)
         return super().__or__(other)
 
     def __ror__(self, other):
-        other = to_regex(other)
+        if type(other) is str and len(other) == 1:
+            return CharSet(self.special_chars, self.chars, other)
+        other = _as_regex(other)
         if isinstance(other, Literal) and len(other.string) == 1:
-            return CharSet(*self, other.string)
+            return CharSet(self.special_chars, self.chars, other.string)
         return super().__ror__(other)
 
-    @property
+    @cached_property
     def pattern_in_char_class(self):
-        return "".join(map(escape_for_char_class, self))
+        # chars are sorted with the ASCII ones first; escape those with one C-level translate call
+        n_ascii = len(self.chars) - len(self._nonascii)
+        return "".join((
+            "".join("\\" + c for c in self.special_chars),
+            "".join(self.chars[:n_ascii]).translate(_CHAR_CLASS_ESCAPES),
+            "".join(map(escape_for_char_class, self.chars[n_ascii:])),
+        ))
 
     def __iter__(self):
         return itertools.chain(self.special_chars, self.chars)
 
     def __contains__(self, char):
-        try:
-            c = to_char(char)
-        except ValueError:
-            raise ValueError(
-                "can only check for containment of single character in {}; got {}".format(
-                    type(self), char
-                )
-            )
-        except TypeError:
-            raise TypeError(
-                "can only check for int or single character in {}; got {}".format(
-                    type(self), type(char)
-                )
-            )
-        else:
-            return c in self.chars or c in self.special_chars
+        return self._contains_codepoint(_membership_codepoint(self, char))
+
+    def _contains_codepoint(self, codepoint: int) -> bool:
+        if codepoint < 128:
+            return bool(self._ascii_mask >> codepoint & 1)
+        return chr(codepoint) in self._nonascii
 
 
 class CharRange(_CharSetOrRange):
+    __slots__ = ("start", "stop")
+
     def __init__(self, start, stop):
         start, stop = map(utf_codepoint, (start, stop))
         if start > stop:
@@ -977,20 +1338,24 @@ class CharRange(_CharSetOrRange):
         self.start = start
         self.stop = stop
 
-    @property
+    @classmethod
+    def _from_codepoints(cls, start: int, stop: int) -> 'CharRange':
+        """Construct directly from codepoints already known to be valid and ordered"""
+        new = cls.__new__(cls)
+        new.start = start
+        new.stop = stop
+        return new
+
+    @cached_property
     def pattern_in_char_class(self):
-        return "{}-{}".format(
-            escape_for_char_class(chr(self.start)),
-            escape_for_char_class(chr(self.stop)),
-        )
+        return f"{escape_for_char_class(chr(self.start))}-{escape_for_char_class(chr(self.stop))}"
 
     def __or__(self, other):
-        if (
-            isinstance(other, CharRange)
-            and ((self.stop + 1) >= other.start)
-            or ((other.stop + 1) >= self.start)
-        ):
-            return CharRange(min(self.start, other.start), max(self.stop, other.stop))
+        other = _as_regex(other)
+        if isinstance(other, CharRange):
+            if self.stop + 1 >= other.start and other.stop + 1 >= self.start:
+                return CharRange._from_codepoints(min(self.start, other.start), max(self.stop, other.stop))
+            return CharClass(self, other)
         if (
             isinstance(other, Literal)
             and len(other.string) == 1
@@ -1000,7 +1365,7 @@ class CharRange(_CharSetOrRange):
         return super().__or__(other)
 
     def __ror__(self, other):
-        other = to_regex(other)
+        other = _as_regex(other)
         if (
             isinstance(other, Literal)
             and len(other.string) == 1
@@ -1028,28 +1393,26 @@ class CharRange(_CharSetOrRange):
         return map(chr, range(self.start, self.stop + 1))
 
     def __contains__(self, char):
-        try:
-            o = utf_codepoint(char)
-        except ValueError:
-            raise ValueError(
-                "can only check for containment of single character in {}; got {}".format(
-                    type(self), char
-                )
-            )
-        except TypeError:
-            raise TypeError(
-                "can only check for int or single character in {}; got {}".format(
-                    type(self), type(char)
-                )
-            )
-        else:
-            return self.start <= o <= self.stop
+        return self.start <= _membership_codepoint(self, char) <= self.stop
 
 
 class CharClassBase(Regex):
+    __slots__ = ("charset", "specials", "ranges", "_range_starts", "_range_stops", "_rendered")
+    _require_group_for_quantification = False
     _negated = False
-
-    def __init__(self, *contents):
+    # content-equal classes share one instance; weakly held, since classes may be built dynamically in bulk
+    _interned = WeakValueDictionary()  # type: Mapping[tuple, CharClassBase]
+
+    def __new__(cls, *contents):
+        new = super().__new__(cls)
+        new._init(contents)
+        if not contents:
+            # as from `copy`, which then sets the state itself; keep that off any shared instance
+            return new
+        # the rendered pattern is a canonical form of the contents: sorted chars, merged ranges, deduped specials
+        return CharClassBase._interned.setdefault((cls, new._rendered), new)
+
+    def _init(self, contents):
         contents = [CharSet(c) if isinstance(c, (str, int)) else c for c in contents]
         bad = [c for c in contents if not isinstance(c, _AcceptableInCharClass)]
         if bad:
@@ -1075,43 +1438,81 @@ class CharClassBase(Regex):
                 specials.extend(chars.specials)
                 ranges.extend(chars.ranges)
 
+        # coalesce overlapping or adjacent ranges and chars into [start, stop, contains_a_range] intervals
+        intervals = []
+        for start, stop, is_range in sorted(itertools.chain(
+            ((r.start, r.stop, True) for r in ranges),
+            ((cp, cp, False) for cp in map(ord, charset)),
+        )):
+            if intervals and start <= intervals[-1][1] + 1:
+                last = intervals[-1]
+                if stop > last[1]:
+                    last[1] = stop
+                last[2] = last[2] or is_range
+            else:
+                intervals.append([start, stop, is_range])
+
+        # runs of 3 or more chars render at least as compactly as a range; shorter runs stay as chars
+        merged, charset = [], []
+        for start, stop, is_range in intervals:
+            if is_range or stop - start >= 2:
+                merged.append(CharRange._from_codepoints(start, stop))
+            else:
+                charset.extend(map(chr, range(start, stop + 1)))
+
         self.charset = CharSet(*charset)
-        self.specials = tuple(specials)
-        self.ranges = tuple(sorted(ranges, key=operator.attrgetter("start")))
-
-    def pattern_in(self, regex: Regex) -> str:
-        template = "[^{}{}]" if self._negated else "[{}{}]"
-        return template.format(
-            self.charset.pattern_in_char_class,
-            "".join(r.pattern_in_char_class for r in itertools.chain(self.specials, self.ranges)),
+        # special classes are interned, so identity de-duplicates them
+        self.specials = tuple(dict.fromkeys(specials))
+        self.ranges = tuple(merged)
+        self._range_starts = array("i", [r.start for r in merged])
+        self._range_stops = array("i", [r.stop for r in merged])
+        # the pattern never depends on context, so render it up front
+        body = self.charset.pattern_in_char_class + "".join(
+            r.pattern_in_char_class for r in itertools.chain(self.specials, self.ranges)
         )
+        self._rendered = ("[^%s]" if self._negated else "[%s]") % body
+
+    def pattern_in(self, regex: Optional[Regex] = None) -> str:
+        return self._rendered
 
 
 class CharClass(CharClassBase, _AcceptableInCharClass):
     def __iter__(self):
-        memo = set(self.charset)
-        yield from sorted(self.charset)
-        for chars in self.ranges:
-            for c in chars:
-                if c not in memo:
-                    yield c
-                    memo.add(c)
+        # ranges are disjoint and exclude charset members, so nothing repeats; interleave the two in codepoint order,
+        # since runs of chars may have been merged into ranges
+        for start, stop in heapq.merge(
+            ((cp, cp) for cp in sorted(map(ord, self.charset))),
+            zip(self._range_starts, self._range_stops),
+        ):
+            yield from map(chr, range(start, stop + 1))
 
     def __invert__(self):
         return NegatedCharClass(self)
 
     def __contains__(self, char: Union[int, str]):
-        return char in self.charset or any(char in r for r in self.ranges)
+        codepoint = _membership_codepoint(self, char)
+        if self.charset._contains_codepoint(codepoint):
+            return True
+        # ranges are sorted and disjoint; the only candidate is the last one starting at or before char
+        i = bisect_right(self._range_starts, codepoint) - 1
+        return i >= 0 and codepoint <= self._range_stops[i]
 
 
 class NegatedCharClass(CharClassBase, Regex):
     _negated = True
 
     def __iter__(self):
-        in_charclass = functools.partial(CharClass.__contains__, self)
-        yield from itertools.filterfalse(
-            in_charclass, map(chr, range(0, MAX_UNICODE_CODE_POINT + 1))
-        )
+        # walk the gaps between the (sorted) excluded intervals rather than testing every codepoint
+        intervals = sorted(itertools.chain(
+            ((cp, cp) for cp in map(ord, self.charset)),
+            zip(self._range_starts, self._range_stops),
+        ))
+        prev_stop = -1
+        for start, stop in intervals:
+            if start > prev_stop + 1:
+                yield from map(chr, range(prev_stop + 1, start))
+            prev_stop = max(prev_stop, stop)
+        yield from map(chr, range(prev_stop + 1, MAX_UNICODE_CODE_POINT + 1))
 
     def __invert__(self):
         return CharClass(self.charset, *self.ranges)
@@ -1121,8 +1522,8 @@ class NegatedCharClass(CharClassBase, Regex):
 
 
 class _BackRef(Regex):
+    __slots__ = ("groupref",)
     _require_group_for_quantification = False
-    groupref = None
 
     def group_in(self, regex: Regex) -> Union[int, str]:
         raise NotImplementedError()
@@ -1133,13 +1534,12 @@ class NamedBackref(_BackRef):
         self.groupref = validate_groupref(groupref)
 
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return "(?P={})".format(self.groupref)
+        return f"(?P={self.groupref})"
 
     def group_in(self, regex: Regex) -> str:
         return self.groupref
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'NamedBackref':
-        rename = to_rename_callable(renames)
+    def _rename(self, rename: RenameFunc) -> 'NamedBackref':
         new_name = rename(self.groupref)
         if new_name is None:
             raise ValueError(
@@ -1153,7 +1553,7 @@ class IntBackref(_BackRef):
         self.groupref = validate_groupref(groupref)
 
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
-        return r"\{}".format(self.groupref)
+        return rf"\{self.groupref}"
 
     def group_in(self, regex: Regex) -> int:
         return self.groupref
@@ -1161,6 +1561,7 @@ class IntBackref(_BackRef):
 
 class _LiteralBackref(_BackRef):
     ref_cls = None
+    _context_free = False
 
     def __init__(self, group: CaptureGroup):
         self.groupref = group
@@ -1177,19 +1578,19 @@ class _LiteralBackref(_BackRef):
     def len(self):
         return self.groupref.len
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> '_LiteralBackref':
+    def _rename(self, rename: RenameFunc) -> '_LiteralBackref':
         # the rename call on groupref is cached - when it is called elsewhere by another referencing liter backref or
         # by the groupref itself, with the same renames it will return the same literal renamed regex object
-        return type(self)(self.groupref.rename(renames))
+        return type(self)(self.groupref._rename(rename))
 
 
 class LiteralUnnamedBackref(_LiteralBackref):
     ref_cls = IntBackref
 
     def group_in(self, regex: Regex) -> int:
-        for i, r in enumerate(regex.capture_groups, 1):
-            if r is self.groupref:
-                return i
+        i = regex._capture_group_index.get(id(self.groupref))
+        if i is not None:
+            return i
         raise IndexError(
             "the group {} is not present in the regex {} and thus is invalid as a backreference there".format(
                 repr(self.groupref), repr(regex)
@@ -1201,9 +1602,9 @@ class LiteralNamedBackref(_LiteralBackref):
     ref_cls = NamedBackref
 
     def group_in(self, regex: Regex) -> str:
-        for r in regex.named_groups:
-            if r is self.groupref:
-                return r.name
+        name = regex._named_group_index.get(id(self.groupref))
+        if name is not None:
+            return name
         raise IndexError(
             "the group {} is not present in the regex {} and thus is invalid as a backreference there".format(
                 repr(self.groupref), repr(regex)
@@ -1212,21 +1613,23 @@ class LiteralNamedBackref(_LiteralBackref):
 
 
 class Conditional(Regex):
+    __slots__ = ("backref", "_then", "_else")
     _require_group_for_quantification = False
 
     def __init__(
         self,
         if_: Union[int, str, NamedGroup, CaptureGroup, _BackRef],
         then_: Regex,
-        else_: Regex = Literal(''),
+        else_: Regex = _EMPTY_LITERAL,
     ):
         self.backref = BackRef(if_)
-        self._then = to_regex(then_)
-        self._else = to_regex(else_)
+        self._then = _as_regex(then_)
+        self._else = _as_regex(else_)
 
+    @_memoize_pattern
     def pattern_in(self, regex: Optional[Regex] = None) -> str:
         regex = regex or self
-        return "(?({}){}|{})".format(
+        return "(?(%s)%s|%s)" % (
             self.backref.group_in(regex),
             self._then.pattern_in(regex),
             self._else.pattern_in(regex),
@@ -1236,7 +1639,7 @@ class Conditional(Regex):
     def subregexes(self):
         yield from (self.backref, self._then, self._else)
 
-    @property
+    @cached_property
     def len(self):
         thenlen = self._then.len
         if thenlen is None:
@@ -1246,10 +1649,9 @@ class Conditional(Regex):
             return thenlen
         return None
 
-    def rename(self, renames: Union[Callable[[str], str], Mapping[str, str]]) -> 'Conditional':
-        rename = to_rename_callable(renames)
-        renamed_ref = self.backref.rename(rename).groupref
-        return type(self)(renamed_ref, self._then.rename(rename), self._else.rename(rename))
+    def _rename(self, rename: RenameFunc) -> 'Conditional':
+        renamed_ref = self.backref._rename(rename).groupref
+        return type(self)(renamed_ref, self._then._rename(rename), self._else._rename(rename))
 
 
 class If:
@@ -1265,7 +1667,98 @@ class _Then(Conditional):
         return Conditional(self.backref, self._then, else_)
 
 
-@functools.singledispatch
+class _ValidationState:
+    """Groups encountered so far in a depth-first walk of the regex being validated"""
+    def __init__(self, regex: Regex):
+        self.regex = regex
+        self.named_groups = {}
+        self.numbered_groups = {}
+        self.group_ids = {}
+        self.last_group_index = 0
+
+    def add_group(self, group: Union[CaptureGroup, NamedGroup]):
+        self.group_ids[id(group)] = group
+        self.last_group_index += 1
+        self.numbered_groups[self.last_group_index] = group
+
+
+def _validate_literal_backref(group: _LiteralBackref, state: _ValidationState):
+    if id(group.groupref) not in state.group_ids:
+        raise IndexError(
+            "group {} is literal backref to a group that does not appear prior in pattern {}".format(
+                repr(group), repr(state.regex)
+            )
+        )
+
+
+def _validate_named_backref(group: NamedBackref, state: _ValidationState):
+    if group.groupref not in state.named_groups:
+        raise IndexError(
+            "group {} is named backref to group with name '{}' which doesn't appear "
+            "prior in pattern {}".format(
+                group, group.groupref, repr(state.regex)
+            )
+        )
+
+
+def _validate_int_backref(group: IntBackref, state: _ValidationState):
+    if group.groupref > state.last_group_index:
+        raise IndexError(
+            "group {} is integer backref to group at index {} but only {} capture groups "
+            "appear prior in pattern {}".format(
+                group, group.groupref, state.last_group_index, repr(state.regex)
+            )
+        )
+
+
+def _validate_named_group(group: NamedGroup, state: _ValidationState):
+    if group.name in state.named_groups:
+        msg = ("named group {} uses name '{}' which appears previously in pattern {}"
+               .format(group, group.name, repr(state.regex)))
+        if REQUIRE_UNIQUE_GROUP_NAMES:
+            raise NameError(msg)
+        else:
+            warn(msg)
+
+    state.named_groups[group.name] = group
+    state.add_group(group)
+
+
+def _validate_capture_group(group: CaptureGroup, state: _ValidationState):
+    state.add_group(group)
+
+
+def _validate_lookbehind(group: Lookbehind, state: _ValidationState):
+    if REQUIRE_FIX_LEN_LOOKBEHIND and not group.assertion_is_fixed_len(state.named_groups, state.numbered_groups):
+        raise ValueError(
+            "lookbehind assertion in pattern '{}' is not fixed-length".format(
+                group
+            )
+        )
+
+
+# a single dict lookup on the exact type of each node in `Regex.validate`, in place of a chain of isinstance checks
+_VALIDATION_HANDLERS = {
+    _LiteralBackref: _validate_literal_backref,
+    NamedBackref: _validate_named_backref,
+    IntBackref: _validate_int_backref,
+    NamedGroup: _validate_named_group,
+    CaptureGroup: _validate_capture_group,
+    Lookbehind: _validate_lookbehind,
+}  # type: Dict[type, Optional[Callable[[Regex, _ValidationState], None]]]
+
+
+def _validation_handler(cls: type) -> Optional[Callable[[Regex, _ValidationState], None]]:
+    try:
+        return _VALIDATION_HANDLERS[cls]
+    except KeyError:
+        # resolve the handler for a new type once through its nearest registered base class, then cache it
+        handler = next((_VALIDATION_HANDLERS[c] for c in cls.__mro__ if c in _VALIDATION_HANDLERS), None)
+        _VALIDATION_HANDLERS[cls] = handler
+        return handler
+
+
+@type_dispatch
 def BackRef(capture_group_or_ref: Union[int, str, CaptureGroup]) -> _BackRef:
     raise TypeError(
         "can't form backreference to type {}, only capture groups".format(
@@ -1285,7 +1778,7 @@ BackRef.register(str)(NamedBackref)
 BackRef.register(_BackRef)(identity)
 
 
-@functools.singledispatch
+@type_dispatch
 def to_regex(x) -> Regex:
     raise NotImplementedError("to_regex is not defined for type {}".format(type(x)))
 
@@ -1303,7 +1796,12 @@ def to_regex_char_from_codepoint(i: int) -> Literal:
 to_regex.register(Regex)(identity)
 
 
-@functools.singledispatch
+def _as_regex(x) -> Regex:
+    # constructors and operators mostly receive existing Regex instances; skip the dispatch for those
+    return x if isinstance(x, Regex) else to_regex(x)
+
+
+@type_dispatch
 def _to_charset(x):
     return x
 
@@ -1318,7 +1816,7 @@ def _to_char_range(start_stop):
     return CharRange(*start_stop)
 
 
-@functools.singledispatch
+@type_dispatch
 def _validate_charclass_arg(arg):
     raise ValueError("Arguments to C[...] must be str, int, slice or previously-constructed "
                      "CharClass/CharSet/CharRange instances; got {}".format(type(arg)))
@@ -1337,8 +1835,19 @@ class _CharClassConstructor:
     def __getitem__(self, item):
         if not isinstance(item, tuple):
             item = (item,)
-        args = map(_validate_charclass_arg, item)
-        return CharClass(*map(_to_charset, args))
+        # plain chars and codepoints all go into one CharSet; slices become ranges directly
+        chars, others = [], []
+        for arg in item:
+            type_ = type(arg)
+            if type_ is str or type_ is int:
+                chars.append(arg)
+            elif type_ is slice:
+                others.append(_to_char_range(validate_range_arg(arg)))
+            else:
+                others.append(_to_charset(_validate_charclass_arg(arg)))
+        if chars:
+            others.append(CharSet(*chars))
+        return CharClass(*others)
 
 
 C = _CharClassConstructor()
@@ -1,11 +1,13 @@
 from typing import List, Tuple, Mapping, Collection, Callable, Optional, Union
+from abc import ABCMeta
 from collections.abc import Collection as CollectionABC
-from functools import singledispatch
+from functools import singledispatch, lru_cache, update_wrapper
 import itertools
 import re
 
-MAX_UNICODE_CODE_POINT = int("10FFFF", 16)
+MAX_UNICODE_CODE_POINT = 0x10FFFF
 CHAR_CLASS_RESERVED_CHARS = ("-", "^", "\\", "]")
+_CHAR_CLASS_RESERVED_SET = frozenset(CHAR_CLASS_RESERVED_CHARS)
 
 ALL_REGEX_FLAG_CHARS = set('aiLmsux')
 ALL_NON_NEGATABLE_REGEX_FLAG_CHARS = set('aLu')
@@ -133,12 +135,61 @@ def validate_char(char: str) -> str:
 
 
 def escape_for_char_class(char: str):
-    if char in CHAR_CLASS_RESERVED_CHARS:
-        return "\\" + char
+    if len(char) == 1:
+        codepoint = ord(char)
+        if codepoint < 128:
+            return _CHAR_CLASS_ASCII_REPR[codepoint]
     return ascii_char_repr_char(char, escape=False)
 
 
-@singledispatch
+def type_dispatch(default: Callable) -> Callable:
+    """A leaner `functools.singledispatch` for the hot coercion functions: dispatches on the type of the first argument
+    with a single dict lookup. Implementations for unregistered types are resolved along the type's MRO on first use and
+    cached. Only concrete, non-abstract types can be registered, explicitly as in `register(int)`; anything else raises
+    TypeError rather than silently registering nothing"""
+    registry = {object: default}
+    cache = {}
+
+    def dispatch(cls: type) -> Callable:
+        impl = cache.get(cls)
+        if impl is None:
+            impl = cache[cls] = next(registry[base] for base in cls.__mro__ if base in registry)
+        return impl
+
+    def register(cls: type, func: Optional[Callable] = None):
+        # unlike singledispatch, there's no annotation-based `@register` form and no ABC support; refuse those outright
+        # rather than silently registering nothing
+        if not isinstance(cls, type):
+            raise TypeError(
+                "{}.register requires a concrete type as its first argument, as in `register(int)`; got {}".format(
+                    default.__name__, repr(cls)
+                )
+            )
+        if isinstance(cls, ABCMeta):
+            raise TypeError(
+                "{}.register doesn't support abstract base classes such as {}; register concrete types".format(
+                    default.__name__, cls.__name__
+                )
+            )
+        if func is None:
+            return lambda func_: register(cls, func_)
+        registry[cls] = func
+        cache.clear()
+        return func
+
+    def wrapper(x, *args, **kwargs):
+        impl = cache.get(type(x))
+        if impl is None:
+            impl = dispatch(type(x))
+        return impl(x, *args, **kwargs)
+
+    wrapper.register = register
+    wrapper.dispatch = dispatch
+    wrapper.registry = registry
+    return update_wrapper(wrapper, default)
+
+
+@type_dispatch
 def to_char(x) -> str:
     raise TypeError("can't convert type {} to single UTF character".format(type(x)))
 
@@ -153,28 +204,46 @@ def to_char_from_str(s: str) -> str:
     return validate_char(s)
 
 
-@singledispatch
+def _longest_ascii_repr(char: str, escape: bool) -> str:
+    char1 = re.escape(char) if escape else char
+    char2 = repr(char)[1:-1]
+    return max(char1, char2, key=len)
+
+
+_ASCII_REPR = tuple(_longest_ascii_repr(chr(x), False) for x in range(128))
+_ASCII_REPR_ESCAPED = tuple(_longest_ascii_repr(chr(x), True) for x in range(128))
+_CHAR_CLASS_ASCII_REPR = tuple(
+    "\\" + c if c in _CHAR_CLASS_RESERVED_SET else _ASCII_REPR[x] for x, c in enumerate(map(chr, range(128)))
+)
+
+
+@type_dispatch
 def ascii_char_repr(x, escape: bool = False) -> str:
     raise TypeError("can't convert type {} to ascii character representation")
 
 
 @ascii_char_repr.register(int)
 def ascii_char_repr_codepoint(x: int, escape: bool = True) -> str:
-    x = validate_codepoint(x)
+    return _ascii_char_repr_unchecked(validate_codepoint(x), escape)
+
+
+def _ascii_char_repr_unchecked(x: int, escape: bool) -> str:
+    # for codepoints already known to be valid
     if x < 128:
-        char = chr(x)
-        char1 = re.escape(char) if escape else char
-        char2 = repr(char)[1:-1]
-        return max(char1, char2, key=len)
-    return r"\u{:04x}".format(x)
+        return (_ASCII_REPR_ESCAPED if escape else _ASCII_REPR)[x]
+    if x > 0xFFFF:
+        # \u takes exactly 4 hex digits; astral codepoints need the 8-digit form
+        return rf"\U{x:08x}"
+    return rf"\u{x:04x}"
 
 
 @ascii_char_repr.register(str)
 def ascii_char_repr_char(x: str, escape: bool = True) -> str:
-    return ascii_char_repr_codepoint(utf_codepoint_str(x), escape=escape)
+    # the ord of a validated single char is always a valid codepoint
+    return _ascii_char_repr_unchecked(ord(validate_char(x)), escape)
 
 
-@singledispatch
+@type_dispatch
 def utf_codepoint(x) -> int:
     raise TypeError("can't compute utf codepoint for type {}".format(type(x)))
 
@@ -186,6 +255,11 @@ def utf_codepoint_int(x: int) -> int:
 
 @utf_codepoint.register(str)
 def utf_codepoint_str(x: str) -> int:
+    # ord already rejects strings of any other length; only pay for validate_char's informative error on failure
+    try:
+        return ord(x)
+    except TypeError:
+        pass
     return ord(validate_char(x))
 
 
@@ -193,6 +267,24 @@ def identity(x):
     return x
 
 
+class cached_property:
+    """Non-data descriptor computing an attribute once per instance and storing it in the instance __dict__, which
+    then shadows the descriptor on subsequent lookups (`functools.cached_property` is not available before python 3.8)"""
+    def __init__(self, func: Callable):
+        self.func = func
+        self.__doc__ = func.__doc__
+        self.name = func.__name__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
 def all_flag_values(flag: re.RegexFlag) -> List[re.RegexFlag]:
     return list(filter(None, map(flag.__and__, re.RegexFlag)))
 
@@ -207,12 +299,26 @@ def _to_regex_flag_chars_none(flags: type(None)):
     return ''
 
 
-@to_regex_flag_chars.register(re.RegexFlag)
-def _to_regex_flag_chars_regex_flag(flag: re.RegexFlag):
+def _regex_flag_chars(flag: re.RegexFlag) -> str:
     flags = all_flag_values(flag)
     return ''.join(_regex_flag_to_regex_flag_char[f] for f in flags)
 
 
+# there are only 2 ** 7 combinations of the flags that have inline chars; compute them all up front
+_REGEX_FLAG_INT_TO_CHARS = {
+    sum(combo): _regex_flag_chars(re.RegexFlag(sum(combo)))
+    for n in range(len(_regex_flag_to_regex_flag_char) + 1)
+    for combo in itertools.combinations(map(int, _regex_flag_to_regex_flag_char), n)
+}
+
+
+@to_regex_flag_chars.register(re.RegexFlag)
+def _to_regex_flag_chars_regex_flag(flag: re.RegexFlag):
+    chars = _REGEX_FLAG_INT_TO_CHARS.get(int(flag))
+    # other bits, e.g. re.DEBUG, take the slow path and fail there as they always have
+    return chars if chars is not None else _regex_flag_chars(flag)
+
+
 @to_regex_flag_chars.register(str)
 def _to_regex_flag_chars_flag_name(name: str):
     char = REGEX_FLAG_NAME_TO_REGEX_FLAG_CHAR.get(name.upper())
@@ -228,12 +334,38 @@ def _to_regex_flag_chars_flag_name(name: str):
 # `regex` actually implement their flags as raw ints bound to global variable names
 @to_regex_flag_chars.register(int)
 def _to_regex_flag_chars_int(int_flag: int):
-    return _to_regex_flag_chars_regex_flag(re.RegexFlag(int_flag))
+    chars = _REGEX_FLAG_INT_TO_CHARS.get(int_flag)
+    return chars if chars is not None else _to_regex_flag_chars_regex_flag(re.RegexFlag(int_flag))
 
 
 @to_regex_flag_chars.register(CollectionABC)
 def _to_regex_flag_chars_collection(flag_collection: Collection[AnyRegexFlag]):
-    return ''.join(itertools.chain.from_iterable(map(to_regex_flag_chars, flag_collection)))
+    # each element maps to a str already; dedupe chars in order, since repeating a flag doesn't compose
+    return ''.join(dict.fromkeys(''.join(map(to_regex_flag_chars, flag_collection))))
+
+
+# only exact types are cached: equal values of other types (True == 1, 2.0 == 2) would otherwise share a cache entry
+# with a valid flag and skip the TypeError they get from `to_regex_flag_chars`
+_CACHEABLE_FLAG_TYPES = frozenset((type(None), str, int, re.RegexFlag))
+
+
+@lru_cache(maxsize=256)
+def _to_regex_flag_chars_typed(flags: AnyRegexFlags, types: tuple) -> str:
+    # `types` is only part of the cache key, telling apart equal inputs of different element types
+    return to_regex_flag_chars(flags)
+
+
+def to_regex_flag_chars_cached(flags: AnyRegexFlags) -> str:
+    """`to_regex_flag_chars`, memoized for single flags and flat tuples of flags of the common types"""
+    type_ = type(flags)
+    if type_ in _CACHEABLE_FLAG_TYPES:
+        return _to_regex_flag_chars_typed(flags, (type_,))
+    if type_ is tuple:
+        types = tuple(map(type, flags))
+        if _CACHEABLE_FLAG_TYPES.issuperset(types):
+            return _to_regex_flag_chars_typed(flags, types)
+    # anything else, e.g. a list of flags, or an invalid value, whose uncached call raises the informative error
+    return to_regex_flag_chars(flags)
 
 
 def to_rename_callable(renames: Union[RenameFunc, Mapping[str, str]]) -> RenameFunc:
@@ -244,17 +376,18 @@ def to_rename_callable(renames: Union[RenameFunc, Mapping[str, str]]) -> RenameF
 
 
 class _Rename:
+    __slots__ = ("renames", "_hash")
+
     def __init__(self, renames: Mapping[str, str]):
         self.renames = dict(renames.items())
-        self._hash = None
+        # instances are used as keys in the capture groups' rename caches, so this is always needed
+        self._hash = hash(frozenset(self.renames.items()))
 
     def __call__(self, name: str) -> str:
         return self.renames.get(name, name)
 
     def __hash__(self):
-        if self._hash is None:
-            self._hash = hash(frozenset(self.renames.items()))
         return self._hash
 
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        return isinstance(other, _Rename) and self._hash == other._hash and self.renames == other.renames
@@ -2,7 +2,6 @@
 import os
 from itertools import chain
 from pathlib import Path
-from setuptools import find_packages
 import pytest
 
 module = type(os)
@@ -10,8 +9,19 @@ module = type(os)
 top_dir = Path(__file__).parent.parent
 
 
+def find_packages(rootdir):
+    # like setuptools.find_packages, without importing setuptools at collection time
+    rootdir = Path(rootdir)
+    stack = [p for p in rootdir.iterdir() if p.is_dir()]
+    while stack:
+        path = stack.pop()
+        if path.name.isidentifier() and (path / "__init__.py").is_file():
+            yield ".".join(path.relative_to(rootdir).parts)
+            stack.extend(p for p in path.iterdir() if p.is_dir())
+
+
 def all_module_paths(rootdir):
-    parents = find_packages(rootdir)
+    parents = sorted(find_packages(rootdir))
     return list(chain(parents, chain.from_iterable(map(submodule_paths, parents))))
 
 
@@ -1,10 +1,15 @@
-from functools import reduce
-from itertools import chain, repeat
-import operator
+from collections.abc import Collection
+from itertools import chain, islice
+import copy
+import pickle
+import re
+from types import SimpleNamespace
+from typing import List
 
 import pytest
 
 import bourbaki.regex.base as bre
+from bourbaki.regex.base import to_regex, Regex
 from bourbaki.regex import *
 
 
@@ -48,74 +53,86 @@ user_host_path_chars = C["!$&'()*+,;"]
 path_query_fragment_chars = C[":-.@"]
 query_fragment_chars = C["?/"]
 
-# scheme
-scheme = alpha + (alphanum | C['+.-'])[:]
-
-# user info
-user_char = alphanum_any | user_host_path_chars | '.' | percent_encoded
-username = user_char[1:]
-password = user_char[:]
-
-userinfo = username("username") + (":" + password("password")).optional
-
-# host
-hostname_label = alphanum[:63] | (alphanum + (alphanum | '-')[:61] + alphanum)
-hostname = (hostname_label("host") + '.').optional + hostname_label("domain") + '.' + hostname_label("top_level_domain")
-
-octet = '0' | (posnum + num.optional) | ('1' + num * 2) | ('2' + C['0':'4'] + num) | ('25' + C['0':'5'])
-ipv4address = octet + ('.' + octet) * 3
-
-quibble = hexdigit[1:4]
-ipv6address = (reduce(operator.or_,
-                      (quibble + (":" + quibble)[:i] + (":" + L("")) + (":" + quibble)[:6 - i] + ":" + quibble for i in
-                       range(1, 6))
-                      )
-               | quibble + (":" + quibble) * 7)
-
-# port
-port = ('0' | posnum + num[:3] | C['1':'5'] + num[:4] |
-        '6' + C['0':'4'] + num * 3 |
-        '65' + C['0':'4'] + num * 2 |
-        '655' + C['0':'2'] + num |
-        '6553' + C['0':'6']) // "a port"
-
-# user info + host + port = authority
-authority = ((userinfo("userinfo") + "@").optional
-             + ((ipv4address("ipv4") | "[" + ipv6address("ipv6") + "]")("ip") | (
-                    hostname("hostname") + C["."].optional))
-             + (":" + port("port")).optional)
-
-# path
-path_char = alphanum_any | user_host_path_chars | path_query_fragment_chars | percent_encoded
-path_segment = path_char[:]
-nonempty_path_segment = path_char[1:]
-
-# last segment can't be empty if present
-path_with_authority = ("/" + path_segment)[:] + L("/").optional
-# no leading double slash allowed
-path_with_no_authority = (L("/").optional + nonempty_path_segment + path_with_authority) | ""
-
-# query
-qchars = alphanum_any | path_query_fragment_chars | query_fragment_chars | C['+*-._'] | percent_encoded
-qexpr = qchars[:]
-qparam = qexpr + "=" + qexpr
-
-query = qparam + (C["&;"] + qparam)[:]
-
-# fragment
-fragment_chars = alphanum_any | path_query_fragment_chars | query_fragment_chars | '=' | percent_encoded
-fragment = fragment_chars[:]
-
-# full uri
-uri = (
-    START +
-    (scheme("scheme") + ":").optional // "scheme, i.e. 'http', 'ftp', etc"
-    + (If("scheme").then_("//").else_("") + authority("authority")).optional // "authority component of a URI"
-    + (If("authority").then_(path_with_authority).else_(path_with_no_authority) + Literal('/').optional)("path")
-    + ("?" + query("query")).optional // "query component of a URI"
-    + ("#" + fragment("fragment")).optional // "fragment component of a URI"
-    + END
-)
+def build_uri_patterns():
+    # built once per session by the fixture below, for the tests that need it, rather than at import
+    # scheme
+    scheme = alpha + (alphanum | C['+.-'])[:]
+
+    # user info
+    user_char = alphanum_any | user_host_path_chars | '.' | percent_encoded
+    username = user_char[1:]
+    password = user_char[:]
+
+    userinfo = username("username") + (":" + password("password")).optional
+
+    # host
+    hostname_label = alphanum[:63] | (alphanum + (alphanum | '-')[:61] + alphanum)
+    hostname = ((hostname_label("host") + '.').optional + hostname_label("domain") + '.'
+                + hostname_label("top_level_domain"))
+
+    # most selective branches first, so that the longest valid octet is tried before its prefixes
+    octet = ('25' + C['0':'5']) | ('2' + C['0':'4'] + num) | ('1' + num * 2) | (posnum + num.optional) | '0'
+    ipv4address = octet + ('.' + octet) * 3
+
+    quibble = hexdigit[1:4]
+    ipv6address = Alternation(
+        *(quibble + (":" + quibble)[:i] + (":" + L("")) + (":" + quibble)[:6 - i] + ":" + quibble
+          for i in range(1, 6)),
+        quibble + (":" + quibble) * 7,
+    )
+
+    # port
+    port = ('0' | posnum + num[:3] | C['1':'5'] + num[:4] |
+            '6' + C['0':'4'] + num * 3 |
+            '65' + C['0':'4'] + num * 2 |
+            '655' + C['0':'2'] + num |
+            '6553' + C['0':'6']) // "a port"
+
+    # user info + host + port = authority
+    authority = ((userinfo("userinfo") + "@").optional
+                 + ((ipv4address("ipv4") | "[" + ipv6address("ipv6") + "]")("ip") | (
+                        hostname("hostname") + C["."].optional))
+                 + (":" + port("port")).optional)
+
+    # path
+    path_char = alphanum_any | user_host_path_chars | path_query_fragment_chars | percent_encoded
+    path_segment = path_char[:]
+    nonempty_path_segment = path_char[1:]
+
+    # last segment can't be empty if present
+    path_with_authority = ("/" + path_segment)[:] + L("/").optional
+    # no leading double slash allowed
+    path_with_no_authority = (L("/").optional + nonempty_path_segment + path_with_authority) | ""
+
+    # query
+    qchars = alphanum_any | path_query_fragment_chars | query_fragment_chars | C['+*-._'] | percent_encoded
+    qexpr = qchars[:]
+    qparam = qexpr + "=" + qexpr
+
+    query = qparam + (C["&;"] + qparam)[:]
+
+    # fragment
+    fragment_chars = alphanum_any | path_query_fragment_chars | query_fragment_chars | '=' | percent_encoded
+    fragment = fragment_chars[:]
+
+    # full uri
+    uri = (
+        START +
+        (scheme("scheme") + ":").optional // "scheme, i.e. 'http', 'ftp', etc"
+        + (If("scheme").then_("//").else_("") + authority("authority")).optional // "authority component of a URI"
+        + (If("authority").then_(path_with_authority).else_(path_with_no_authority) + Literal('/').optional)("path")
+        + ("?" + query("query")).optional // "query component of a URI"
+        + ("#" + fragment("fragment")).optional // "fragment component of a URI"
+        + END
+    )
+
+    return SimpleNamespace(octet=octet, ipv6address=ipv6address, authority=authority, uri=uri)
+
+
+@pytest.fixture(scope="session")
+def uri_patterns():
+    return build_uri_patterns()
+
 
 wikipedia_examples = [
     "https://john.doe@www.example.com:123/forum/questions/?tag=networking&order=newest#top",
@@ -142,9 +159,14 @@ parses = [
 ]
 
 
-def validate_uri_parse(uri_, groupdict, ignore=('authority', 'userinfo', 'ip', 'hostname'), defaults=dict(path='')):
-    match = uri.fullmatch(uri_)
+def validate_uri_parse(uri_regex, uri_, groupdict, **kwargs):
+    return validate_uri_match(uri_, uri_regex.fullmatch(uri_), groupdict, **kwargs)
+
+
+URI_PARSE_IGNORE = frozenset(('authority', 'userinfo', 'ip', 'hostname'))
 
+
+def validate_uri_match(uri_, match, groupdict, ignore=URI_PARSE_IGNORE, defaults=dict(path='')):
     if match is None:
         print("No match: {}".format(uri_))
         return False
@@ -152,25 +174,27 @@ def validate_uri_parse(uri_, groupdict, ignore=('authority', 'userinfo', 'ip', '
     gd = match.groupdict()
     groupdict = {**defaults, **groupdict}
 
+    keys = gd.keys() - ignore
+    matched = {k for k in keys if gd[k] is not None}
+    unmatched = keys - matched
+    expected = groupdict.keys()
+
+    missing = {k for k in unmatched & expected if groupdict[k] is not None}
+    extra = matched - expected
+    wrong = {k for k in matched & expected if gd[k] != groupdict[k]}
+    if not (missing or extra or wrong):
+        return True
+
+    # the report is only ever read for failing tests; only format it for those
     print("'{}' :".format(uri_))
     print_ = lambda s: print("\t", s)
-    bad = False
-    for k, v in gd.items():
-        if k in ignore:
-            continue
-        if v is None:
-            if groupdict.get(k) is not None:
-                print_("group name '{}' should have matched '{}' but wasn't matched".format(k, groupdict[k]))
-                bad = True
-        else:
-            if k not in groupdict:
-                print_("group name '{}' was matched to '{}' but shouldn't have".format(k, v))
-                bad = True
-            elif v != groupdict[k]:
-                print_("group name '{}' was matched to '{}' but should have matched '{}'".format(k, v, groupdict[k]))
-                bad = True
-
-    return not bad
+    for k in sorted(missing):
+        print_("group name '{}' should have matched '{}' but wasn't matched".format(k, groupdict[k]))
+    for k in sorted(extra):
+        print_("group name '{}' was matched to '{}' but shouldn't have".format(k, gd[k]))
+    for k in sorted(wrong):
+        print_("group name '{}' was matched to '{}' but should have matched '{}'".format(k, gd[k], groupdict[k]))
+    return False
 
 
 foo, bar, baz = map(L, "foo bar baz".split())
@@ -186,18 +210,38 @@ def test_conditional_pattern(s, match, pattern=conditional_regex):
         assert not pattern.debug_match(s)
 
 
+@pytest.mark.parametrize("pattern, notes", [
+    (foo("first") + (bar // "a comment") + baz, ["NAMED GROUP: first", "COMMENT: a comment"]),
+    (foo + bar("g") + baz // "trailing", ["NAMED GROUP: g", "COMMENT: trailing"]),
+    (foo // "c", ["COMMENT: c"]),
+])
+def test_debug_match_output_repeats(capsys, pattern, notes):
+    outputs = []
+    for _ in range(2):
+        assert pattern.debug_match("foobarbaz", print_failures=True)
+        outputs.append(capsys.readouterr().out)
+    assert all(note in outputs[0] for note in notes)
+    assert outputs[0] == outputs[1]
+
+
 @pytest.mark.parametrize("pattern, len",
                          [(foo, 3),
                           (bar, 3),
                           (alpha, 1),
                           (num, 1),
                           (percent_encoded, 3),
-                          (conditional_regex, None),
-                          (uri, None)])
+                          (foo | bar, 3),
+                          (foo | alpha, None),
+                          (conditional_regex, None)])
 def test_pattern_len(pattern, len):
     assert pattern.len == len
 
 
+@pytest.mark.uri
+def test_uri_pattern_len(uri_patterns):
+    assert uri_patterns.uri.len is None
+
+
 @pytest.mark.parametrize("s, match", [("foobar", True), ("baz", True), ("foo", False), ("bar", False)])
 def test_negated_pattern(s, match, pattern=conditional_regex):
     if match:
@@ -206,6 +250,28 @@ def test_negated_pattern(s, match, pattern=conditional_regex):
         assert (~pattern).debug_match(s)
 
 
+def test_match_revalidates_after_settings_change(monkeypatch):
+    pattern = foo("a") + bar
+    assert pattern.match("foobar")
+    monkeypatch.setattr(bre, "REQUIRE_UNIQUE_GROUP_NAMES", not bre.REQUIRE_UNIQUE_GROUP_NAMES)
+    assert pattern.match("foobar")
+    assert pattern.__dict__["_validated"] == bre._validation_settings()
+
+
+def test_compiled_patterns_shared_across_instances():
+    assert (L("foo") + bar).compile() is (foo + L("bar")).compile()
+    assert (foo + bar).compiled is (foo + bar).compiled
+
+
+def test_literal_backref_pattern_depends_on_containing_regex():
+    group = foo()
+    inner = group + bre.BackRef(group)
+    outer = bar() + inner
+    assert inner.pattern == '(foo)\\1'
+    assert outer.pattern == '(bar)(foo)\\2'
+    assert inner.pattern == '(foo)\\1'
+
+
 def test_repeated_name_error():
     with pytest.raises(NameError):
         pattern = L("foo")("foo") + L("bar")("foo")
@@ -218,10 +284,74 @@ def test_out_of_bounds_backref_error():
         pattern.validate()
 
 
-@pytest.mark.parametrize("charclass, char", chain(zip(repeat(~C[Digit]), '0123456789'),
-                                                  zip(repeat(~C[WordChar]), 'abcdeFGHIJK')))
-def test_negated_charclass(charclass, char):
-    assert not charclass.match(char)
+@pytest.mark.parametrize("charclass, chars", [(~C[Digit], '0123456789'), (~C[WordChar], 'abcdeFGHIJK')])
+def test_negated_charclass(charclass, chars):
+    assert not any(map(charclass.match, chars))
+
+
+@pytest.mark.parametrize("char, contained", [("a", True), ("-", True), ("]", True), ("\u00e9", True),
+                                             ("x", False), ("\u00f0", False)])
+def test_charset_contains(char, contained):
+    assert (char in CharSet("abc-]", "\u00e9")) is contained
+
+
+@pytest.mark.parametrize("charclass, pattern", [
+    (C["a":"f", "c":"k", "b"], "[a-k]"),
+    (C["a":"c", "d":"f", "x"], "[xa-f]"),
+    (C["0":"9", "a":"c", "5b"], "[0-9a-c]"),
+    (C["abcd"], "[a-d]"),
+    (C["ab"], "[ab]"),
+    (C["a":"c", "d", "xy"], "[xya-d]"),
+])
+def test_charclass_ranges_merged(charclass, pattern):
+    assert str(charclass) == pattern
+
+
+@pytest.mark.parametrize("char, contained", [("a", True), ("f", True), ("g", False), ("0", True), ("4", False),
+                                             ("x", True), ("/", False), ("\u00e9", True), ("\u0100", False)])
+def test_charclass_contains(char, contained):
+    charclass = C["a":"f", "0":"3", "x", "\u00e9":"\u00ff"]
+    assert (char in charclass) is contained
+    assert (char in ~charclass) is not contained
+
+
+@pytest.mark.parametrize("char", ["\u00e9", "\u4e2d", "\U0001f600"])
+def test_non_ascii_charclass_match(char):
+    assert C[char, "a"].fullmatch(char)
+
+
+@pytest.mark.parametrize("charclass, chars", [
+    (C["abcx"], "abcx"),
+    (C["xyz", "b"], "bxyz"),
+    (C["q", "a":"c", "x", "e":"g", "\u00e9"], "abcefgqx\u00e9"),
+])
+def test_charclass_iter_in_codepoint_order(charclass, chars):
+    assert "".join(charclass) == chars
+
+
+def test_negated_charclass_iter():
+    charclass = C["a":"f", "c":"k", "0_"]
+    expected = [chr(i) for i in range(256) if chr(i) not in charclass]
+    assert list(islice(~charclass, len(expected))) == expected
+
+
+@pytest.mark.parametrize("left, right, pattern", [
+    (CharRange("a", "f"), CharRange("d", "k"), "[a-k]"),
+    (CharRange("a", "f"), CharRange("g", "k"), "[a-k]"),
+    (CharRange("a", "c"), CharRange("x", "z"), "[a-cx-z]"),
+    (CharRange("x", "z"), CharRange("a", "c"), "[a-cx-z]"),
+])
+def test_charrange_or(left, right, pattern):
+    assert str(left | right) == pattern
+
+
+@pytest.mark.parametrize("left, right", [
+    (alpha | num, num | alpha),
+    (C["abc"], C["a":"c"]),
+    (~(alpha | "_"), ~C["_", "a":"z"]),
+])
+def test_equal_charclasses_shared(left, right):
+    assert left is right
 
 
 def test_charclass_or_yields_charclass():
@@ -261,10 +391,106 @@ def test_single_char_special_char_literal(char):
     assert r.match(char)
 
 
+@pytest.mark.parametrize("string", ["", "a", "(", "foo", "a.b+"])
+def test_literals_interned(string):
+    assert Literal(string) is Literal(string)
+    assert to_regex(string) is Literal(string)
+
+
+@pytest.mark.parametrize("regex, expected", [
+    (L("a") + "b", L("ab")),
+    ("a" + L(".b") + L("*"), L("a.b*")),
+    (L("foo") + alpha + "ba" + L("r") + "+", bre.Sequence("foo", alpha, "bar+")),
+    (bre.Sequence("fo", "o", foo("x"), "ba", "r"), bre.Sequence("foo", foo("x"), "bar")),
+])
+def test_adjacent_literals_merged(regex, expected):
+    assert regex.pattern == expected.pattern
+    assert type(regex) is type(expected)
+    if isinstance(regex, bre.Sequence):
+        assert list(map(type, regex.regexes)) == list(map(type, expected.regexes))
+
+
+def test_interned_literal_groups_distinct():
+    assert L("foo").as_("foo") is not L("foo").as_("foo")
+    assert (L("foo") + alpha).regexes[0] is foo
+
+
+@pytest.mark.parametrize("regex", [START, END, ANYCHAR, Digit, ~L("abc"), START + L("a") + END,
+                                   C["a":"z", Digit] | "_", conditional_regex, html_tag_nongreedy])
+@pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy, lambda r: pickle.loads(pickle.dumps(r))],
+                         ids=["copy", "deepcopy", "pickle"])
+def test_copy_round_trip(regex, copier):
+    copied = copier(regex)
+    assert type(copied) is type(regex)
+    assert copied.pattern == regex.pattern
+
+
+def test_special_chars_interned():
+    assert bre._SpecialClassAcceptableInCharClass("d") is Digit
+    assert bre._SpecialSymbol("$", 0) is END
+    assert str(C[Digit, "a", Digit] | Digit) == r"[a\d]"
+
+
+@pytest.mark.parametrize("pattern, string", [
+    (L("a") | "b", "[ab]"),
+    (L("a") | "b" | "c", "[abc]"),
+    (foo | "a" | "b" | bar, "foo|[ab]|bar"),
+    ("a" | foo | "b", "a|foo|b"),
+    ((L("a") | "b")[2:], "[ab]{2,}"),
+    (L("x") + (L("a") | "b"), "x[ab]"),
+])
+def test_single_char_alternatives_folded(pattern, string):
+    assert pattern.pattern == string
+
+
+def test_to_regex_register_subclass():
+    class Word(str):
+        pass
+
+    class Snake(Word):
+        pass
+
+    assert to_regex(Snake("ab")).pattern == "ab"
+    to_regex.register(Word)(lambda w: Literal(w) + WordBoundary)
+    assert to_regex(Snake("ab")).pattern == r"ab\b"
+
+
+def test_to_regex_register_decorator():
+    class Digits(int):
+        pass
+
+    @to_regex.register(Digits)
+    def digits_to_regex(d: Digits) -> Regex:
+        return Digit * len(str(d))
+
+    assert to_regex(Digits(123)).pattern == r"\d{3}"
+    assert digits_to_regex(Digits(12)).pattern == r"\d{2}"
+
+
+def _annotated_to_regex(x: bytes) -> Regex:
+    return Literal(x.decode())
+
+
+@pytest.mark.parametrize("cls", [_annotated_to_regex, Collection, List[str], "str"])
+def test_to_regex_register_rejects_unsupported_forms(cls):
+    with pytest.raises(TypeError):
+        to_regex.register(cls)
+    # nothing was registered
+    with pytest.raises(NotImplementedError):
+        to_regex(b"abc")
+
+
 def test_charclass_ror():
     assert isinstance(foo | alpha, Alternation)
 
 
+@pytest.mark.parametrize("behind", [bre.NamedBackref("foo"), bre.IntBackref(1)])
+def test_backref_lookbehind_fixed_len(require_fixlen_lookbehinds, behind):
+    p = foo("foo") + (behind << bar)
+    assert p.validate() is p
+    assert p.search("foofoobar")
+
+
 def test_variable_len_lookbehind_error(require_fixlen_lookbehinds):
     p = (foo | alpha) << bar
     assert isinstance(p, bre.Lookbehind)
@@ -273,6 +499,12 @@ def test_variable_len_lookbehind_error(require_fixlen_lookbehinds):
         p.validate()
 
 
+@pytest.mark.parametrize("start, stop", [("ab", "z"), ("a", ""), ("", "z")])
+def test_charclass_range_requires_single_chars(start, stop):
+    with pytest.raises(ValueError):
+        C[start:stop]
+
+
 @pytest.mark.parametrize("pattern, len_",
                          [(foo * 3, 9),
                           (foo[:3], None),
@@ -282,6 +514,17 @@ def test_range_repeated_len(pattern, len_):
     assert pattern.len == len_
 
 
+@pytest.mark.parametrize("pattern, string", [
+    ((foo | bar)[2:3], '(?:foo|bar){2,3}'),
+    ((foo | bar) * 2, '(?:foo|bar){2}'),
+    ((foo | bar)[1:], '(?:foo|bar)+'),
+    ((~C['a':'z'])[1:], '[^a-z]+'),
+    ((foo & 'IGNORECASE')[:], '(?i:foo)*'),
+])
+def test_quantified_pattern(pattern, string):
+    assert pattern.pattern == string
+
+
 def test_atomic_with_support(atomic_group_support):
     assert (+foo).pattern_in(None) == '(?>foo)'
 
@@ -290,14 +533,36 @@ def test_atomic_without_support():
     assert (+foo).pattern_in(None) == '(?=(foo))\\1'
 
 
-@pytest.mark.parametrize("o", map(str, chain(range(1, 2 ** 8, 11), [255])))
-def test_octet_pattern(o):
-    assert octet.fullmatch(o)
+def test_atomic_idempotent(atomic_group_support):
+    assert (+(+foo)).pattern == '(?>foo)'
+
+
+def test_atomic_idempotent_without_support():
+    assert (+(+foo)).pattern == '(?=(foo))\\1'
+    assert (+START).pattern == '^'
 
 
+@pytest.mark.uri
+def test_octet_pattern(uri_patterns):
+    # one compile and one scan over every octet, rather than a test per value
+    octets = "\n".join(map(str, range(2 ** 8)))
+    sweep = re.compile("^(?:{})$".format(uri_patterns.octet.pattern), re.MULTILINE)
+    assert sweep.findall(octets) == octets.split("\n")
+    assert not sweep.findall("\n".join(chain(map(str, range(2 ** 8, 1000)), ["00", "01", "012"])))
+
+
+@pytest.mark.uri
 @pytest.mark.parametrize("uri,parse", zip(wikipedia_examples, parses))
-def test_uri_parse(uri, parse):
-    validate_uri_parse(uri, parse)
+def test_uri_parse(uri, parse, uri_patterns):
+    assert validate_uri_parse(uri_patterns.uri, uri, parse)
+
+
+@pytest.mark.uri
+def test_uri_parse_batch(uri_patterns):
+    # every example in one scan; START and END anchor at line boundaries in MULTILINE mode
+    matches = list(uri_patterns.uri.compile(re.MULTILINE).finditer("\n".join(wikipedia_examples)))
+    assert [match.group() for match in matches] == wikipedia_examples
+    assert all(map(validate_uri_match, wikipedia_examples, matches, parses))
 
 
 @pytest.mark.parametrize("pattern, s, match", [
@@ -1,6 +1,7 @@
 import pytest
 import re
 from bourbaki.regex import L
+from bourbaki.regex.utils import to_regex_flag_chars, to_regex_flag_chars_cached
 
 
 foobar = L("foobar")
@@ -117,3 +118,28 @@ def test_with_and_without_options(pos_options, neg_options, pattern):
 
     if pos_splattable or neg_splattable:
         assert with_options_explicit_splat.pattern == pattern
+
+
+def test_nested_options():
+    nested = L("foo") + (L("bar") & 'IGNORECASE') + L("baz")
+    assert nested.pattern == 'foo(?i:bar)baz'
+    assert nested.match('fooBARbaz')
+
+
+@pytest.mark.parametrize('flags,chars', [
+    ((re.IGNORECASE, re.IGNORECASE), 'i'),
+    ([re.IGNORECASE | re.MULTILINE, 'MULTILINE', re.ASCII], 'ima'),
+    ([], ''),
+])
+def test_flag_chars_deduplicated(flags, chars):
+    assert to_regex_flag_chars(flags) == chars
+
+
+@pytest.mark.parametrize('warm,flags', [
+    ((2,), (2.0,)),
+    (2, 2.0),
+])
+def test_cached_flag_chars_independent_of_call_history(warm, flags):
+    to_regex_flag_chars_cached(warm)
+    with pytest.raises(TypeError):
+        to_regex_flag_chars_cached(flags)
@@ -1,3 +1,5 @@
+import gc
+import weakref
 from collections import OrderedDict
 import pytest
 from bourbaki.regex import L, If
@@ -49,3 +51,37 @@ def test_drop_names_literal_backrefs(regex, pattern):
 def test_drop_names_named_backrefs_raises(regex):
     with pytest.raises(ValueError):
         _ = regex.drop_names()
+
+
+def test_rename_preserves_nongreedy():
+    regex = foo + L("baz")[1:].nongreedy
+    assert regex.rename(rename_dict).pattern == '(?P<food>foo)(?:baz)+?'
+
+
+def test_distinct_renames_not_cached_together():
+    renamed1, renamed2 = foo.rename(dict(foo='food')), foo.rename(dict(foo='fool'))
+    assert renamed1.pattern == '(?P<food>foo)'
+    assert renamed2.pattern == '(?P<fool>foo)'
+    assert foo.rename(dict(foo='food')) is renamed1
+
+
+@pytest.mark.parametrize("regex", [foobar1, foobarbaz2, foo + bar])
+@pytest.mark.parametrize("rename", [rename_dict, rename_ordereddict])
+def test_equal_rename_mappings_are_cached(regex, rename):
+    assert regex.rename(rename) is regex.rename(type(rename)(rename.items()))
+    assert regex.rename(rename) is not regex.rename(dict(rename, foo='fool'))
+
+
+def test_rename_cache_holds_only_the_last_rename():
+    class Rename:
+        def __call__(self, name):
+            return name.upper()
+
+    shared = L("x")  # interned, so it lives for the whole process
+    first = Rename()
+    first_ref = weakref.ref(first)
+    shared.rename(first)
+    shared.rename(Rename())
+    del first
+    gc.collect()
+    assert first_ref() is None